@@ -4,15 +4,32 @@ Monitors TBL RSS feed, summarizes new articles, stores in PocketBase
 """
 
 import asyncio
+import base64
 import httpx
-import feedparser  # type: ignore
-from datetime import datetime
+import orjson
+import tiktoken
+from datetime import datetime, timezone
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
+import functools
+import hashlib
+import logging
 import os
+import re
+import sqlite3
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import cast
+import xml.etree.ElementTree as ET
 
 _is_loaded = load_dotenv()
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s %(levelname)s %(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING)  # httpx logs every request at INFO
+log = logging.getLogger("rss")
+
 # Configuration
 POCKETBASE_URL = os.getenv("POCKETBASE_URL")
 PB_EMAIL = os.getenv("PB_EMAIL")
@@ -21,6 +38,21 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 READER_API_URL = os.getenv("READER_API_URL")
 READER_BEARER_TOKEN = os.getenv("READER_BEARER_TOKEN")
 PUSHBULLET_TOKEN = os.getenv("PUSHBULLET_TOKEN")
+MAX_CONCURRENCY = 5  # Max items processed in parallel
+MAX_ITEMS = int(os.getenv("MAX_ITEMS", "20"))  # Only the newest feed entries are considered each run
+JSON_HEADERS = {"Content-Type": "application/json"}  # For bodies pre-encoded with orjson
+PB_BATCH_SIZE = 50  # PocketBase's default max requests per batch
+PB_MAX_PER_PAGE = 1000  # PocketBase's max records per list page
+EVIDENCE_UPDATES_RE = re.compile(r"evidence-updates", re.IGNORECASE)
+CACHE_DIR = Path(__file__).parent / ".cache"
+FEED_META_PATH = CACHE_DIR / "feed_meta.json"
+LLM_CACHE_PATH = CACHE_DIR / "llm_cache.db"
+PB_TOKEN_PATH = CACHE_DIR / "pb_token.json"
+SEEN_URLS_PATH = CACHE_DIR / "seen_urls.db"
+PB_TOKEN_MIN_TTL = 60  # Re-authenticate when the cached token expires within this many seconds
+LLM_MODEL = "gpt-5-mini"
+MAX_ARTICLE_TOKENS = 8000  # Article tokens sent to the LLM; longer articles are truncated
+PROMPT_VERSION = "v1"  # Bump when the summary prompt changes to invalidate cached responses
 
 
 # Validate required environment variables
@@ -39,9 +71,9 @@ def validate_env_vars():
     missing_vars = [name for name, value in required_vars.items() if not value]
 
     if missing_vars:
-        print(f"Error: Missing required environment variables: {', '.join(missing_vars)}")
-        print(f".env file loaded: {_is_loaded}")
-        print(f"Current working directory: {os.getcwd()}")
+        log.error("Missing required environment variables: %s", ", ".join(missing_vars))
+        log.error(".env file loaded: %s", _is_loaded)
+        log.error("Current working directory: %s", os.getcwd())
         raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
 
@@ -54,46 +86,107 @@ openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
 async def get_pb_auth_token(client: httpx.AsyncClient) -> str:
     """Authenticate with PocketBase and return token"""
     auth_url = f"{POCKETBASE_URL}/api/collections/_superusers/auth-with-password"
-    print(f"DEBUG: Attempting to authenticate with URL: {auth_url}")
-    print(f"DEBUG: POCKETBASE_URL = '{POCKETBASE_URL}'")
+    log.debug("Attempting to authenticate with URL: %s", auth_url)
     response = await client.post(
         auth_url,
-        json={"identity": PB_EMAIL, "password": PB_PASSWORD},
+        content=orjson.dumps({"identity": PB_EMAIL, "password": PB_PASSWORD}),
+        headers=JSON_HEADERS,
     )
     response.raise_for_status()
     try:
-        return response.json()["token"]
+        return orjson.loads(response.content)["token"]
     except Exception as e:
-        print(f"ERROR parsing auth response: {e}")
-        print(f"Response status: {response.status_code}")
-        print(f"Response text: {response.text}")
+        log.error("Error parsing auth response: %s (status %s): %s", e, response.status_code, response.text)
         raise
 
 
-async def fetch_existing_urls(client: httpx.AsyncClient, token: str) -> set[str]:
-    """Fetch last 50 URLs from PocketBase for comparison"""
-    print("DEBUG: Fetching existing URLs from PocketBase")
-    response = await client.get(
-        f"{POCKETBASE_URL}/api/collections/rss_feeds/records",
-        params={"sort": "-created", "perPage": 50},
-        headers={"Authorization": token},
-    )
-    response.raise_for_status()
+def _jwt_exp(token: str) -> float:
+    """Read the exp claim from a JWT without verifying it; the server still validates the token"""
+    payload = token.split(".")[1]
+    return orjson.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))["exp"]
+
+
+async def get_cached_pb_auth_token(client: httpx.AsyncClient) -> str:
+    """Return a cached PocketBase token if it is still valid, otherwise authenticate and cache it"""
     try:
-        items = response.json()["items"]
-        return {item["url"] for item in items}
+        cached = orjson.loads(PB_TOKEN_PATH.read_bytes())
+        if cached["exp"] - time.time() > PB_TOKEN_MIN_TTL:
+            log.debug("Reusing cached PocketBase token")
+            return cached["token"]
+    except (FileNotFoundError, orjson.JSONDecodeError, KeyError, TypeError):
+        pass
+
+    token = await get_pb_auth_token(client)
+    try:
+        exp = _jwt_exp(token)
     except Exception as e:
-        print(f"ERROR parsing fetch_existing_urls response: {e}")
-        print(f"Response status: {response.status_code}")
-        print(f"Response text: {response.text}")
-        raise
+        log.warning("Could not read token expiry, not caching: %s", e)
+        return token
+    # Superuser token: mkstemp creates the file readable only by the owner, and os.replace
+    # swaps it in atomically so overlapping runs never see a partial file
+    CACHE_DIR.mkdir(exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=".pb_token.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps({"token": token, "exp": exp}))
+        os.replace(tmp_path, PB_TOKEN_PATH)
+    except OSError as e:
+        log.warning("Could not cache PocketBase token: %s", e)
+        Path(tmp_path).unlink(missing_ok=True)
+    return token
+
+
+async def fetch_existing_records(client: httpx.AsyncClient, token: str, urls: list[str]) -> dict[str, dict]:
+    """Return records already stored in PocketBase for urls, keyed by url
+
+    One OR-filter query, paged at PocketBase's max page size since duplicate
+    records can make the match count exceed len(urls).
+    """
+    if not urls:
+        return {}
+    log.debug("Checking %d URLs against PocketBase", len(urls))
+    filter_str = " || ".join(f'url="{_escape_filter_value(url)}"' for url in urls)
+    existing: dict[str, dict] = {}
+    page = 1
+    while True:
+        response = await client.get(
+            f"{POCKETBASE_URL}/api/collections/rss_feeds/records",
+            params={
+                "filter": filter_str,
+                "page": page,
+                "perPage": PB_MAX_PER_PAGE,
+                "fields": "id,url,summary,pushed_at",
+                "skipTotal": 1,
+            },
+            headers={"Authorization": token},
+        )
+        response.raise_for_status()
+        try:
+            items = orjson.loads(response.content)["items"]
+        except Exception as e:
+            log.error(
+                "Error parsing fetch_existing_records response: %s (status %s): %s",
+                e,
+                response.status_code,
+                response.text,
+            )
+            raise
+        for item in items:
+            # Among duplicates, keep one that was already notified so it isn't treated as pending
+            if item["url"] not in existing or item.get("pushed_at"):
+                existing[item["url"]] = item
+        if len(items) < PB_MAX_PER_PAGE:
+            return existing
+        page += 1
+
 
+def _escape_filter_value(value: str) -> str:
+    """Escape a string for use inside a double-quoted PocketBase filter literal"""
+    return value.replace("\\", "\\\\").replace('"', '\\"')
 
-async def create_rss_record(
-    client: httpx.AsyncClient, item: dict, token: str, summary: str | None = None, markdown: str | None = None
-) -> dict:
-    """Create new RSS record in PocketBase"""
-    print(f"DEBUG: Creating RSS record for {item['link']}")
+
+def build_rss_record(item: dict, summary: str | None = None, markdown: str | None = None) -> dict:
+    """Build the rss_feeds record body for an RSS item"""
     data = {
         "url": item["link"],
         "feed_url": item["link"],
@@ -103,49 +196,264 @@ async def create_rss_record(
         data["summary"] = summary
     if markdown:
         data["markdown"] = markdown
+    return data
+
+
+async def pb_batch(client: httpx.AsyncClient, requests: list[dict], token: str) -> list[dict]:
+    """Send requests through the PocketBase batch API, one {status, body} result per request
+
+    A batch is one transaction, so a single failing request rolls back the
+    whole chunk. Failed requests are recorded and the rest of the chunk is
+    resent; if the batch API itself is unavailable, requests are sent one by one.
+    """
+    results: list[dict] = [{} for _ in requests]
+    for start in range(0, len(requests), PB_BATCH_SIZE):
+        remaining = list(range(start, min(start + PB_BATCH_SIZE, len(requests))))
+        while remaining:
+            log.debug("Sending %d PocketBase requests in one batch", len(remaining))
+            response = await client.post(
+                f"{POCKETBASE_URL}/api/batch",
+                content=orjson.dumps({"requests": [requests[i] for i in remaining]}),
+                headers={"Authorization": token, **JSON_HEADERS},
+            )
+            if response.is_success:
+                try:
+                    for i, result in zip(remaining, orjson.loads(response.content)):
+                        results[i] = result
+                except Exception as e:
+                    log.error(
+                        "Error parsing pb_batch response: %s (status %s): %s", e, response.status_code, response.text
+                    )
+                    raise
+                break
+
+            failed = _batch_failures(response)
+            if not failed:
+                log.warning("PocketBase batch failed (status %s), sending requests individually", response.status_code)
+                for i in remaining:
+                    results[i] = await _pb_request(client, requests[i], token)
+                break
+
+            for position, failure in failed.items():
+                results[remaining[position]] = {"status": response.status_code, "body": failure}
+            remaining = [i for position, i in enumerate(remaining) if position not in failed]
+    return results
+
+
+def _batch_failures(response: httpx.Response) -> dict[int, dict]:
+    """Map positions of the sub-requests that failed a batch transaction to their error details"""
+    if response.status_code != 400:
+        return {}
+    try:
+        failures = orjson.loads(response.content)["data"]["requests"]
+        return {int(position): failure.get("response", failure) for position, failure in failures.items()}
+    except Exception:
+        return {}
 
-    response = await client.post(
-        f"{POCKETBASE_URL}/api/collections/rss_feeds/records",
-        json=data,
-        headers={"Authorization": token},
-    )
-    response.raise_for_status()
+
+async def _pb_request(client: httpx.AsyncClient, request: dict, token: str) -> dict:
+    """Send a single batch-style request on its own, returning a {status, body} result"""
     try:
-        return response.json()
-    except Exception as e:
-        print(f"ERROR parsing create_rss_record response: {e}")
-        print(f"Response status: {response.status_code}")
-        print(f"Response text: {response.text}")
-        raise
+        response = await client.request(
+            request["method"],
+            f"{POCKETBASE_URL}{request['url']}",
+            content=orjson.dumps(request["body"]),
+            headers={"Authorization": token, **JSON_HEADERS},
+        )
+    except httpx.HTTPError as e:
+        return {"status": 500, "body": str(e)}
+    try:
+        body = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        body = response.text
+    return {"status": response.status_code, "body": body}
+
+
+async def create_rss_records(client: httpx.AsyncClient, records: list[dict], token: str) -> list[dict]:
+    """Create RSS records in PocketBase via the batch API, one result per record"""
+    return await pb_batch(
+        client,
+        [{"method": "POST", "url": "/api/collections/rss_feeds/records", "body": record} for record in records],
+        token,
+    )
 
 
-async def fetch_rss(url: str) -> list[dict]:
-    """Fetch and parse RSS feed"""
-    feed = feedparser.parse(url)
-    return [
-        {
-            "link": entry.link,
-            "title": entry.title,
-            "pubDate": entry.published,
+async def mark_records_pushed(client: httpx.AsyncClient, record_ids: list[str], token: str) -> list[dict]:
+    """Set pushed_at on RSS records whose notification was sent, one result per record"""
+    pushed_at = datetime.now(timezone.utc).isoformat()
+    return await pb_batch(
+        client,
+        [
+            {
+                "method": "PATCH",
+                "url": f"/api/collections/rss_feeds/records/{record_id}",
+                "body": {"pushed_at": pushed_at},
+            }
+            for record_id in record_ids
+        ],
+        token,
+    )
+
+
+def load_feed_meta() -> dict:
+    """Load cached ETag/Last-Modified headers from the previous feed fetch"""
+    try:
+        return orjson.loads(FEED_META_PATH.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
+
+
+def save_feed_meta(meta: dict):
+    """Persist ETag/Last-Modified headers for the next conditional fetch"""
+    CACHE_DIR.mkdir(exist_ok=True)
+    FEED_META_PATH.write_bytes(orjson.dumps(meta))
+
+
+async def fetch_rss(
+    client: httpx.AsyncClient, url: str, meta: dict | None = None, max_items: int | None = None
+) -> tuple[list[dict], dict]:
+    """Fetch and parse RSS feed, streaming items as they arrive
+
+    Sends a conditional GET using the cached validators in meta. Returns the
+    parsed items and the validators to cache; no items on 304 Not Modified.
+    Stops reading the feed once max_items entries have been parsed.
+    """
+    meta = meta or {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    parser = ET.XMLPullParser(events=("end",))
+    items = []
+
+    def drain_events():
+        # With only "end" events requested, each event is an (event, Element) pair
+        for _, elem in cast(Iterator[tuple[str, ET.Element]], parser.read_events()):
+            if elem.tag != "item" or len(items) == max_items:
+                continue
+            items.append(
+                {
+                    "link": (elem.findtext("link") or "").strip(),
+                    "title": (elem.findtext("title") or "").strip(),
+                    "pubDate": (elem.findtext("pubDate") or "").strip(),
+                }
+            )
+            elem.clear()
+
+    async with client.stream("GET", url, headers=headers) as response:
+        if response.status_code == 304:
+            log.info("Feed not modified since last fetch")
+            return [], meta
+        response.raise_for_status()
+        new_meta = {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
         }
-        for entry in feed.entries
-    ]
+        async for chunk in response.aiter_bytes():
+            parser.feed(chunk)
+            drain_events()
+            if len(items) == max_items:
+                # The rest of the document is never read, so don't close the parser on it
+                return items, new_meta
+    parser.close()
+    drain_events()
+    return items, new_meta
 
 
 async def scrape_markdown(client: httpx.AsyncClient, url: str) -> str:
     """Scrape article content as markdown"""
-    print(f"DEBUG: Scraping markdown for {url}")
-    response = await client.get(
+    log.debug("Scraping markdown for %s", url)
+    async with client.stream(
+        "GET",
         f"{READER_API_URL}/{url}",
         headers={"Authorization": f"Bearer {READER_BEARER_TOKEN}", "X-Respond-With": "markdown"},
-    )
-    response.raise_for_status()
+    ) as response:
+        response.raise_for_status()
+        buf = bytearray()
+        async for chunk in response.aiter_bytes(65536):
+            buf.extend(chunk)
     # The API returns plain markdown text, not JSON
-    return response.text
+    return buf.decode(response.encoding or "utf-8", errors="replace")
+
+
+_llm_cache: sqlite3.Connection | None = None
+
+
+def get_llm_cache() -> sqlite3.Connection:
+    """Open (once) the on-disk LLM response cache"""
+    global _llm_cache
+    if _llm_cache is None:
+        CACHE_DIR.mkdir(exist_ok=True)
+        _llm_cache = sqlite3.connect(LLM_CACHE_PATH)
+        _llm_cache.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, response TEXT, created_at INTEGER)"
+        )
+    return _llm_cache
+
+
+_seen_urls_db: sqlite3.Connection | None = None
+
+
+def get_seen_urls_db() -> sqlite3.Connection:
+    """Open (once) the local store of URLs that are fully processed"""
+    global _seen_urls_db
+    if _seen_urls_db is None:
+        CACHE_DIR.mkdir(exist_ok=True)
+        _seen_urls_db = sqlite3.connect(SEEN_URLS_PATH)
+        _seen_urls_db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY)")
+    return _seen_urls_db
+
+
+def filter_seen_urls(urls: list[str]) -> set[str]:
+    """Return the subset of urls already recorded as fully processed"""
+    if not urls:
+        return set()
+    db = get_seen_urls_db()
+    placeholders = ",".join("?" * len(urls))
+    return {row[0] for row in db.execute(f"SELECT url FROM urls WHERE url IN ({placeholders})", urls)}
+
+
+def mark_urls_seen(urls: list[str]):
+    """Record urls as fully processed so later runs skip them without asking PocketBase"""
+    if not urls:
+        return
+    db = get_seen_urls_db()
+    with db:
+        db.executemany("INSERT OR IGNORE INTO urls (url) VALUES (?)", [(url,) for url in urls])
+
+
+@functools.cache
+def get_encoding() -> tiktoken.Encoding:
+    """Tokenizer for LLM_MODEL, falling back to o200k_base for unknown models"""
+    try:
+        return tiktoken.encoding_for_model(LLM_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def truncate_to_token_budget(markdown: str, max_tokens: int = MAX_ARTICLE_TOKENS) -> str:
+    """Truncate markdown to at most max_tokens tokens"""
+    enc = get_encoding()
+    tokens = enc.encode(markdown, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return markdown
+    log.debug("Truncating article from %d to %d tokens", len(tokens), max_tokens)
+    return enc.decode(tokens[:max_tokens]) + "\n...[truncated]"
 
 
 async def generate_summary(markdown: str) -> str:
-    """Generate LLM summary of article"""
+    """Generate LLM summary of article, reusing a cached response for identical input"""
+    # Tokenizing long articles is CPU-bound; keep it off the event loop
+    markdown = await asyncio.to_thread(truncate_to_token_budget, markdown)
+    key = hashlib.sha256(f"{LLM_MODEL}|{PROMPT_VERSION}|{markdown}".encode()).hexdigest()
+    cache = get_llm_cache()
+    row = cache.execute("SELECT response FROM cache WHERE key = ?", (key,)).fetchone()
+    if row:
+        log.debug("LLM cache hit")
+        return row[0]
+
     prompt = f"""You are a medical research assistant. Please analyze this medical research article and provide:
 1. A brief summary (2-3 sentences)
 2. The main clinical question
@@ -160,20 +468,35 @@ Return the response as pure markdown, without code blocks, backticks, or any oth
 
 Here's the article: {markdown}"""
 
-    response = await openai_client.chat.completions.create(
-        model="gpt-5-mini", messages=[{"role": "user", "content": prompt}]
+    started = time.monotonic()
+    stream = await openai_client.chat.completions.create(
+        model=LLM_MODEL, messages=[{"role": "user", "content": prompt}], stream=True
     )
-    if response.choices[0].message.content is None:
+    parts = []
+    async for chunk in stream:
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        if not parts:
+            log.debug("LLM first token after %.2fs", time.monotonic() - started)
+        parts.append(chunk.choices[0].delta.content)
+    if not parts:
         raise ValueError("LLM returned no content")
-    return response.choices[0].message.content
+    content = "".join(parts)
+
+    with cache:
+        cache.execute(
+            "INSERT OR REPLACE INTO cache (key, response, created_at) VALUES (?, ?, ?)",
+            (key, content, int(time.time())),
+        )
+    return content
 
 
 async def send_pushbullet(client: httpx.AsyncClient, title: str, body: str):
     """Send Pushbullet notification"""
     response = await client.post(
         "https://api.pushbullet.com/v2/pushes",
-        headers={"Access-Token": PUSHBULLET_TOKEN},
-        json={"type": "note", "title": title, "body": body},
+        headers={"Access-Token": PUSHBULLET_TOKEN, **JSON_HEADERS},
+        content=orjson.dumps({"type": "note", "title": title, "body": body}),
     )
     response.raise_for_status()
 
@@ -183,89 +506,254 @@ async def log_cron_run(client: httpx.AsyncClient, token: str, service: str, stat
     try:
         response = await client.post(
             f"{POCKETBASE_URL}/api/collections/cronlog/records",
-            json={"service": service, "status": status},
-            headers={"Authorization": token},
+            content=orjson.dumps({"service": service, "status": status}),
+            headers={"Authorization": token, **JSON_HEADERS},
         )
         response.raise_for_status()
-        print(f"Logged to cronlog: {service} - {status}")
+        log.info("Logged to cronlog: %s - %s", service, status)
     except Exception as e:
-        print(f"Failed to log to cronlog: {e}")
+        log.error("Failed to log to cronlog: %s", e)
+
+
+def make_http_client(max_connections: int) -> httpx.AsyncClient:
+    """Create an HTTP/2 client with its own bounded connection pool"""
+    # Limits must be set on the transport when one is supplied explicitly
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=60.0
+        ),
+        retries=2,
+    )
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(30.0, connect=5.0))
 
 
-async def process_item(client: httpx.AsyncClient, item: dict, token: str):
-    """Process a single RSS item"""
-    print(f"Processing: {item['title']}")
+async def process_item(client: httpx.AsyncClient, item: dict) -> tuple[dict, str | None]:
+    """Process a single RSS item, returning its record body and summary to notify with"""
+    log.info("Processing: %s", item["title"])
 
     # Skip evidence-updates
-    if "evidence-updates" in item["link"].lower():
-        print(f"Skipping evidence-updates: {item['title']}")
+    if EVIDENCE_UPDATES_RE.search(item["link"]):
+        log.info("Skipping evidence-updates: %s", item["title"])
         # Create minimal record for evidence-updates
-        await create_rss_record(client, item, token)
-        print(f"Created record for: {item['title']}")
-        return
+        return build_rss_record(item), None
 
     # Scrape and summarize BEFORE creating record
     markdown = await scrape_markdown(client, item["link"])
     summary = await generate_summary(markdown)
+    return build_rss_record(item, summary=summary, markdown=markdown), summary
 
-    # Only create record after all processing succeeds
-    await create_rss_record(client, item, token, summary=summary, markdown=markdown)
-    print(f"Created record for: {item['title']}")
 
-    # Notify
-    await send_pushbullet(client, "New Summary", summary)
-    print(f"Completed: {item['title']}")
+async def fetch_existing_records_with_reauth(
+    client: httpx.AsyncClient, token: str, urls: list[str]
+) -> tuple[dict[str, dict], str]:
+    """Fetch existing records, re-authenticating once if the cached token is rejected"""
+    try:
+        return await fetch_existing_records(client, token, urls), token
+    except httpx.HTTPStatusError as e:
+        # PocketBase treats a revoked token as a guest, so it surfaces as 401 or 403
+        if e.response.status_code not in (401, 403):
+            raise
+        log.warning("PocketBase rejected the auth token (%s), re-authenticating", e.response.status_code)
+        PB_TOKEN_PATH.unlink(missing_ok=True)
+        token = await get_cached_pb_auth_token(client)
+        return await fetch_existing_records(client, token, urls), token
+
+
+def split_existing_records(
+    items: list[dict], existing: dict[str, dict]
+) -> tuple[list[tuple[dict, str, str]], list[str]]:
+    """Split feed items with existing records into pending notifications and finished URLs
+
+    A record with a summary but no pushed_at was summarized by an earlier run
+    whose notification never went out.
+    """
+    pending = []
+    done_urls = []
+    for item in items:
+        record = existing.get(item["link"])
+        if not record:
+            continue
+        if record.get("summary") and not record.get("pushed_at"):
+            pending.append((item, record["id"], record["summary"]))
+        else:
+            done_urls.append(item["link"])
+    return pending, done_urls
+
+
+async def process_items(
+    client: httpx.AsyncClient, items: list[dict]
+) -> tuple[list[tuple[dict, dict, str | None]], list[str]]:
+    """Process items concurrently, returning (item, record, summary) for each success and the errors"""
+    # The semaphore bounds in-flight requests
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def _guarded(item: dict):
+        async with sem:
+            return await process_item(client, item)
+
+    results = await asyncio.gather(*[_guarded(item) for item in items], return_exceptions=True)
+
+    processed = []
+    errors = []
+    for item, result in zip(items, results):
+        if isinstance(result, BaseException):
+            error_msg = f"Error processing {item['title']}: {result}"
+            log.error(error_msg)
+            errors.append(error_msg)
+        else:
+            processed.append((item, *result))
+    return processed, errors
+
+
+async def persist_items(
+    client: httpx.AsyncClient, token: str, processed: list[tuple[dict, dict, str | None]]
+) -> tuple[list[tuple[dict, str, str | None]], list[str]]:
+    """Create records for processed items in one batch, returning (item, record_id, summary) per created record"""
+    try:
+        responses = await create_rss_records(client, [record for _, record, _ in processed], token)
+    except Exception as e:
+        error_msg = f"Error creating records: {e}"
+        log.error(error_msg)
+        return [], [error_msg]
+
+    created = []
+    errors = []
+    for (item, _, summary), response in zip(processed, responses):
+        if response.get("status", 500) >= 400:
+            error_msg = f"Error creating record for {item['title']}: {response.get('body')}"
+            log.error(error_msg)
+            errors.append(error_msg)
+        else:
+            log.info("Created record for: %s", item["title"])
+            created.append((item, response["body"]["id"], summary))
+    return created, errors
+
+
+async def notify_items(
+    client: httpx.AsyncClient, entries: list[tuple[dict, str, str]]
+) -> tuple[list[tuple[dict, str]], list[str]]:
+    """Send a Pushbullet notification per (item, record_id, summary), returning (item, record_id) for each sent"""
+    results = await asyncio.gather(
+        *[send_pushbullet(client, "New Summary", summary) for _, _, summary in entries],
+        return_exceptions=True,
+    )
+    pushed = []
+    errors = []
+    for (item, record_id, _), result in zip(entries, results):
+        if isinstance(result, BaseException):
+            error_msg = f"Error notifying for {item['title']}: {result}"
+            log.error(error_msg)
+            errors.append(error_msg)
+        else:
+            pushed.append((item, record_id))
+    return pushed, errors
+
+
+async def record_pushed(client: httpx.AsyncClient, token: str, pushed: list[tuple[dict, str]]) -> list[str]:
+    """Set pushed_at on notified records so retries don't send duplicates, returning the errors"""
+    try:
+        responses = await mark_records_pushed(client, [record_id for _, record_id in pushed], token)
+    except Exception as e:
+        error_msg = f"Error marking {len(pushed)} records as pushed: {e}"
+        log.error(error_msg)
+        return [error_msg]
+
+    errors = []
+    for (item, _), response in zip(pushed, responses):
+        if response.get("status", 500) >= 400:
+            error_msg = f"Error marking {item['title']} as pushed: {response.get('body')}"
+        elif not response.get("body", {}).get("pushed_at"):
+            # PocketBase drops fields missing from the schema instead of rejecting them
+            error_msg = f"pushed_at not saved for {item['title']}; is the field missing from rss_feeds?"
+        else:
+            log.info("Completed: %s", item["title"])
+            continue
+        log.error(error_msg)
+        errors.append(error_msg)
+    return errors
 
 
 async def main():
     """Main execution"""
-    print(f"Starting RSS processing at {datetime.now()}")
+    log.info("Starting RSS processing")
     service_name = "rss-parser"
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    # Separate pools per upstream so a slow host can't starve the others of connections. The scrape
+    # pool matches MAX_CONCURRENCY so no in-flight item waits on a pool slot.
+    async with (
+        make_http_client(max_connections=8) as pb_client,
+        make_http_client(max_connections=MAX_CONCURRENCY) as scrape_client,
+        make_http_client(max_connections=2) as notify_client,
+    ):
         token = None
         try:
             # Authenticate
-            token = await get_pb_auth_token(client)
-
-            # Fetch existing URLs from PocketBase
-            existing_urls = await fetch_existing_urls(client, token)
-            print(f"Found {len(existing_urls)} existing URLs in PocketBase")
+            token = await get_cached_pb_auth_token(pb_client)
 
             # Fetch RSS
-            items = await fetch_rss("https://www.thebottomline.org.uk/feed/")
-            print(f"Found {len(items)} RSS items")
+            items, feed_meta = await fetch_rss(
+                scrape_client, "https://www.thebottomline.org.uk/feed/", load_feed_meta(), max_items=MAX_ITEMS
+            )
+            log.info("Found %d RSS items", len(items))
+
+            # Skip URLs this machine already finished; only ask PocketBase about the rest
+            seen_urls = filter_seen_urls([item["link"] for item in items])
+            unseen_items = [item for item in items if item["link"] not in seen_urls]
+            log.info("Found %d RSS items not yet seen locally", len(unseen_items))
+
+            # Check which unseen feed URLs already exist in PocketBase
+            existing, token = await fetch_existing_records_with_reauth(
+                pb_client, token, [item["link"] for item in unseen_items]
+            )
+            log.info("Found %d existing URLs in PocketBase", len(existing))
 
             # Filter to only new items
-            new_items = [item for item in items if item["link"] not in existing_urls]
-            print(f"Found {len(new_items)} new items to process")
+            new_items = [item for item in unseen_items if item["link"] not in existing]
+            log.info("Found %d new items to process", len(new_items))
 
-            # Process items
-            errors = []
-            for item in new_items:
-                try:
-                    await process_item(client, item, token)
-                    await asyncio.sleep(1)  # Rate limiting
-                except Exception as e:
-                    error_msg = f"Error processing {item['title']}: {e}"
-                    print(error_msg)
-                    errors.append(error_msg)
+            pending, done_urls = split_existing_records(unseen_items, existing)
+            if pending:
+                log.info("Found %d summarized items still to notify", len(pending))
+
+            processed, errors = await process_items(scrape_client, new_items)
+
+            # Only create records after all processing succeeds, in a single batch
+            created, create_errors = await persist_items(pb_client, token, processed)
+            errors += create_errors
+            done_urls += [item["link"] for item, _, summary in created if not summary]
+
+            # Notify once records exist, including items left over from earlier runs
+            to_notify = [(item, record_id, summary) for item, record_id, summary in created if summary] + pending
+            pushed, notify_errors = await notify_items(notify_client, to_notify)
+            errors += notify_errors
+
+            # The notification has already been sent, so the URL is done locally even if PocketBase can't be updated
+            done_urls += [item["link"] for item, _ in pushed]
+            errors += await record_pushed(pb_client, token, pushed)
+
+            mark_urls_seen(done_urls)
 
             # Log success or partial success
             if errors:
                 status = f"Completed with {len(errors)} error(s): {'; '.join(errors[:3])}"  # Log first 3 errors
             else:
                 status = f"Success: Processed {len(new_items)} new items"
+                # Only cache validators once every item succeeded, so failures are retried next run
+                save_feed_meta(feed_meta)
 
-            await log_cron_run(client, token, service_name, status)
-            print("Processing complete")
+            await log_cron_run(pb_client, token, service_name, status)
+            log.info("Processing complete")
 
         except Exception as e:
             error_status = f"Failed: {str(e)}"
-            print(f"Fatal error: {e}")
+            log.error("Fatal error: %s", e)
+            # Drop a cached token the server rejected so the next run re-authenticates
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code in (401, 403):
+                PB_TOKEN_PATH.unlink(missing_ok=True)
             # Try to log failure if we have a token
             if token:
-                await log_cron_run(client, token, service_name, error_status)
+                await log_cron_run(pb_client, token, service_name, error_status)
             raise
 
 